@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from typing import List
+from app.enums import APIs
 
 
 class Settings(BaseSettings):
@@ -15,6 +16,46 @@ class Settings(BaseSettings):
     # CORS Configuration
     ALLOWED_ORIGINS: List[str] = ["*"]
     
+    # Data Configuration
+    CATALOG_PATH: str = "data/examples/plants_data.json"
+    
+    # HTTP Cache Configuration
+    CACHE_CONTROL_PLANTS: str = "public, max-age=300, stale-while-revalidate=60"
+    CACHE_CONTROL_PREDICTIONS: str = "public, max-age=60, stale-while-revalidate=30"
+    PREDICTIONS_CACHE_TTL: int = 300
+    HTTP_CACHE_MAX_BYTES: int = 64*1024*1024
+    HTTP_CACHE_MAX_BODY_BYTES: int = 8*1024*1024
+    
+    # Prediction Jobs Configuration
+    JOBS_DB_PATH: str = "data/jobs.sqlite3"
+    PREDICTION_JOB_WORKERS: int = 2
+    PREDICTION_JOB_CONCURRENCY: int = 8
+    PREDICTION_JOB_PAGE_SIZE: int = 50
+    PREDICTION_JOB_POLL_INTERVAL: float = 1.0
+    PREDICTION_JOB_LEASE: float = 30
+    
+    # iNaturalist Phenology Configuration
+    INATURALIST_URL: str = APIs.INATURALIST.value
+    INATURALIST_DB_PATH: str = "data/inaturalist.sqlite3"
+    INATURALIST_WORKERS: int = 4
+    INATURALIST_PER_PAGE: int = 200
+    INATURALIST_RATE_LIMIT: float = 1.0
+    PHENOLOGY_CELL_SIZE: float = 1.0
+    
+    # Tracing and Profiling Configuration
+    TRACING_ENABLED: bool = True
+    SLOW_REQUEST_MS: float = 1000
+    PROFILING_ENABLED: bool = False
+    PROFILE_HEADER: str = "X-Profile"
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL: float = 0.005
+    PROFILE_DIR: str = "data/profiles"
+    
+    # Compression Configuration
+    COMPRESSION_MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
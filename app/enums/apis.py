@@ -3,4 +3,5 @@ from enum import Enum
 class APIs(str, Enum):
     GLOBE = 'https://api.globe.gov/search/v1/'
     PERENUAL = 'https://perenual.com/api/v2/'
+    INATURALIST = 'https://api.inaturalist.org/v1/'
     
\ No newline at end of file
@@ -0,0 +1,6 @@
+"""
+Ingestion package initialization
+"""
+
+from .__readers import MalformedRecord, Record, RecordFormat, detect_format, read_records, split_records, read_range
+from .__pipeline import IngestionCheckpoint, convert_to_plant, validate_chunk, validate_range, ingest
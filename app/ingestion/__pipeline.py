@@ -0,0 +1,263 @@
+from typing import Any, Iterable, Iterator, Optional
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from itertools import islice
+from pydantic import ValidationError
+from app.models import Point, Location, Plant
+from .__readers import MalformedRecord, Record, RecordFormat, csv_fieldnames, detect_format, read_range, read_records, split_records
+import json, os, shutil
+
+
+def _empty_to_none(value: Any) -> Any:
+    return None if value == '' else value
+
+
+def convert_to_plant(data: dict[str, Any]) -> Plant:
+    """Convert a raw flower record, flat or with a nested location, into a validated Plant model"""
+
+    if not isinstance(data, dict):
+        raise ValueError(f'Expected a JSON object, got {type(data).__name__}')
+
+    location = data.get('location') or {}
+
+    if not isinstance(location, dict):
+        raise ValueError(f'Expected location to be an object, got {type(location).__name__}')
+
+    coords = location.get('coords') or {}
+
+    if not isinstance(coords, dict):
+        raise ValueError(f'Expected location.coords to be an object, got {type(coords).__name__}')
+
+    latitude = coords.get('latitude', data.get('latitude'))
+    longitude = coords.get('longitude', data.get('longitude'))
+
+    if _empty_to_none(latitude) is None or _empty_to_none(longitude) is None:
+        raise ValueError('Missing latitude or longitude')
+
+    return Plant(
+        id=data['id'],
+        scientific_name=data['scientific_name'],
+        common_name=data.get('common_name'),
+        description=data.get('description'),
+        max_height=data.get('max_height'),
+        initial_height=data.get('initial_height'),
+        temperature_to_grow=data.get('temperature_to_grow'),
+        growth_rate=data.get('growth_rate'),
+        bloom_season=data.get('bloom_season'),
+        created_at=data.get('created_at'),
+        updated_at=data.get('updated_at'),
+        planting_date=data.get('planting_date'),
+        location=Location(
+            country_code=_empty_to_none(location.get('country_code', data.get('country_code'))),
+            location_name=_empty_to_none(location.get('location_name', data.get('location_name'))),
+            # Out of range coordinates are rejected by Point, not clamped into range
+            coords=Point(latitude=latitude, longitude=longitude)
+        )
+    )
+
+
+def validate_chunk(first_index: int, records: list[Record]) -> tuple[list[str], list[str]]:
+    """
+    Validate a chunk of records in a worker process.
+
+    Returns:
+        tuple: The accepted plants and the rejected rows, both already serialized to JSON.
+    """
+
+    accepted: list[str] = []
+    rejected: list[str] = []
+
+    for index, record in enumerate(records, start=first_index):
+
+        if isinstance(record, MalformedRecord):
+            rejected.append(json.dumps({'record': index, 'reason': record.reason, 'data': record.text}))
+            continue
+
+        try:
+            plant = convert_to_plant(record)
+        except ValidationError as error:
+            reason = '; '.join(
+                f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+                for detail in error.errors()
+            )
+        except (AttributeError, KeyError, TypeError, ValueError) as error:
+            reason = f'{type(error).__name__}: {error}'
+        else:
+            accepted.append(json.dumps(plant.dict(), default=str, separators=(',', ':')))
+            continue
+
+        rejected.append(json.dumps({'record': index, 'reason': reason, 'data': record}, default=str))
+
+    return accepted, rejected
+
+
+def validate_range(
+    first_index: int,
+    path: str,
+    record_format: RecordFormat,
+    start: int,
+    end: int,
+    fieldnames: Optional[list[str]] = None
+) -> tuple[list[str], list[str]]:
+    """Decode and validate a byte range of an NDJSON or CSV file, so the parsing also runs in the worker"""
+    return validate_chunk(first_index, list(read_range(path, record_format, start, end, fieldnames)))
+
+
+@dataclass
+class IngestionCheckpoint:
+    source: str
+    record_format: str
+    chunk_size: int
+    next_chunk: int = 0
+    accepted: int = 0
+    rejected: int = 0
+
+    @staticmethod
+    def load(path: str) -> Optional['IngestionCheckpoint']:
+
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as file:
+            return IngestionCheckpoint(**json.load(file))
+
+    def save(self, path: str) -> None:
+        _write_atomic(path, json.dumps(asdict(self)))
+
+
+def _write_atomic(path: str, content: str) -> None:
+
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+        file.write(content)
+
+    os.replace(f'{path}.tmp', path)
+
+
+def _chunks(records: Iterable[Record], chunk_size: int) -> Iterator[list[Record]]:
+
+    iterator = iter(records)
+
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _merge_parts(parts_dir: str, chunks: int, output_path: str, errors_path: str) -> None:
+    """Concatenate the per chunk parts into the catalog JSON array and the error file"""
+
+    with open(f'{output_path}.tmp', 'w', encoding='utf-8') as output, \
+         open(f'{errors_path}.tmp', 'w', encoding='utf-8') as errors:
+
+        output.write('[')
+        first = True
+
+        for chunk in range(chunks):
+
+            with open(os.path.join(parts_dir, f'{chunk:08d}.json'), encoding='utf-8') as part:
+                for line in part:
+                    output.write(('\n' if first else ',\n') + line.rstrip('\n'))
+                    first = False
+
+            with open(os.path.join(parts_dir, f'{chunk:08d}.errors.ndjson'), encoding='utf-8') as part:
+                shutil.copyfileobj(part, errors)
+
+        output.write('\n]\n')
+
+    os.replace(f'{output_path}.tmp', output_path)
+    os.replace(f'{errors_path}.tmp', errors_path)
+
+
+def ingest(
+    source: str,
+    output_path: str,
+    errors_path: Optional[str] = None,
+    record_format: Optional[RecordFormat] = None,
+    chunk_size: int = 5000,
+    workers: Optional[int] = None,
+    restart: bool = False
+) -> IngestionCheckpoint:
+    """
+    Stream a bulk plant dump into the catalog file, validating chunks across a process pool.
+
+    Every finished chunk is written to `<output>.parts/` and recorded in `<output>.checkpoint.json`,
+    an interrupted run resumes from the first unfinished chunk. Only `workers * 2` chunks are held in
+    memory at any time, whatever the size of the input.
+
+    Args:
+        source (str): JSON array, NDJSON or CSV file with the raw records.
+        output_path (str): Catalog file to write, a JSON array of plants.
+        errors_path (str): NDJSON file for the rejected rows, `<output>.errors.ndjson` by default.
+        record_format (str): Input format, guessed from the extension when omitted.
+        chunk_size (int): Records per chunk sent to a worker.
+        workers (int): Worker processes, one per core by default.
+        restart (bool): Ignore an existing checkpoint and start over.
+
+    Returns:
+        IngestionCheckpoint: Final counts of accepted and rejected records.
+    """
+
+    record_format = record_format or detect_format(source)
+    errors_path = errors_path or f'{output_path}.errors.ndjson'
+    workers = workers or os.cpu_count() or 1
+
+    parts_dir = f'{output_path}.parts'
+    checkpoint_path = f'{output_path}.checkpoint.json'
+
+    checkpoint = None if restart else IngestionCheckpoint.load(checkpoint_path)
+
+    if checkpoint and (checkpoint.source, checkpoint.record_format, checkpoint.chunk_size) != (
+        os.path.abspath(source), record_format, chunk_size
+    ):
+        raise ValueError(f'{checkpoint_path} belongs to another import, pass restart=True to discard it')
+
+    if checkpoint is None:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        checkpoint = IngestionCheckpoint(os.path.abspath(source), record_format, chunk_size)
+
+    os.makedirs(parts_dir, exist_ok=True)
+
+    # NDJSON and CSV chunks are sent as byte ranges, found without decoding the records, and parsed in
+    # the workers. JSON array items can't be delimited without parsing them, those are decoded here.
+    if record_format == 'json':
+        records = islice(read_records(source, record_format), checkpoint.next_chunk*chunk_size, None)
+        tasks = ((validate_chunk, records_chunk) for records_chunk in _chunks(records, chunk_size))
+    else:
+        fieldnames = csv_fieldnames(source) if record_format == 'csv' else None
+        ranges = islice(split_records(source, record_format, chunk_size), checkpoint.next_chunk, None)
+        tasks = ((validate_range, source, record_format, start, end, fieldnames) for start, end in ranges)
+
+    chunks = enumerate(tasks, start=checkpoint.next_chunk)
+
+    def write_part(chunk: int, future: Future) -> None:
+
+        accepted, rejected = future.result()
+
+        _write_atomic(os.path.join(parts_dir, f'{chunk:08d}.json'), ''.join(f'{line}\n' for line in accepted))
+        _write_atomic(os.path.join(parts_dir, f'{chunk:08d}.errors.ndjson'), ''.join(f'{line}\n' for line in rejected))
+
+        checkpoint.next_chunk = chunk + 1
+        checkpoint.accepted += len(accepted)
+        checkpoint.rejected += len(rejected)
+        checkpoint.save(checkpoint_path)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        # Results are written in input order, so the checkpoint is always a prefix of the input
+        in_flight: deque[tuple[int, Future]] = deque()
+
+        for chunk, (task, *args) in chunks:
+
+            in_flight.append((chunk, executor.submit(task, chunk*chunk_size, *args)))
+
+            if len(in_flight) >= workers*2:
+                write_part(*in_flight.popleft())
+
+        while in_flight:
+            write_part(*in_flight.popleft())
+
+    _merge_parts(parts_dir, checkpoint.next_chunk, output_path, errors_path)
+
+    shutil.rmtree(parts_dir)
+    os.remove(checkpoint_path)
+
+    return checkpoint
@@ -0,0 +1,274 @@
+from typing import Any, BinaryIO, Iterator, Literal, NamedTuple, Optional, Union
+import csv, io, json, os
+
+RecordFormat = Literal['json', 'ndjson', 'csv']
+
+
+class MalformedRecord(NamedTuple):
+    """A record that couldn't even be decoded, it goes straight to the error file"""
+    text: str
+    reason: str
+
+
+Record = Union[dict[str, Any], MalformedRecord]
+
+_extensions: dict[str, RecordFormat] = {
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.csv': 'csv',
+}
+
+
+def detect_format(path: str) -> RecordFormat:
+    """Guess the record format from the file extension"""
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension not in _extensions:
+        raise ValueError(f'Unknown input format for {path}, use one of {", ".join(_extensions)}')
+
+    return _extensions[extension]
+
+
+def _is_truncated(error: json.JSONDecodeError, buffer: str) -> bool:
+    """Whether a decode error comes from an item cut at the end of the buffer rather than a bad item"""
+
+    # An open string runs to the end of the buffer, and a cut literal or number ("tr", "1.", "1e-")
+    # fails a few characters before it
+    return error.msg.startswith('Unterminated string') or len(buffer) - error.pos <= 5
+
+
+def _item_end(buffer: str, position: int) -> Optional[int]:
+    """End of the top level array item starting at position, None if it isn't complete in the buffer"""
+
+    depth = 0
+    in_string = False
+    escaped = False
+
+    for index in range(position, len(buffer)):
+
+        char = buffer[index]
+
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+
+            if depth == 0:
+                return index + 1
+            if depth < 0:
+                return index
+        elif char == ',' and depth == 0:
+            return index
+
+    return None
+
+
+def read_json_array(path: str, block_size: int = 1 << 16, max_item_size: int = 16 << 20) -> Iterator[Record]:
+    """
+    Stream the items of a top level JSON array without loading the whole file.
+
+    A malformed item is skipped up to the next top level separator and yielded as a MalformedRecord.
+    No item may be longer than max_item_size characters, so memory stays bounded even on broken input.
+    """
+
+    decoder = json.JSONDecoder()
+
+    with open(path, encoding='utf-8') as file:
+
+        buffer = ''
+        position = 0
+        offset = 0  # Characters of the file before the start of buffer
+        eof = False
+        started = False
+
+        def fill() -> None:
+            nonlocal buffer, position, offset, eof
+
+            if len(buffer) - position > max_item_size:
+                raise ValueError(f'{path}: item at character {offset + position} is longer than {max_item_size} characters')
+
+            block = file.read(block_size)
+            offset += position
+            buffer = buffer[position:] + block
+            position = 0
+            eof = not block
+
+        while True:
+
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+
+            if position >= len(buffer):
+                if eof:
+                    if started:
+                        raise ValueError(f'{path}: unterminated JSON array')
+                    return
+
+                fill()
+                continue
+
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError(f'{path}: expected a JSON array')
+
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == ']':
+                return
+
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+
+                if not eof and _is_truncated(error, buffer):
+                    fill()
+                    continue
+
+                end = _item_end(buffer, position)
+
+                if end is None:
+                    if eof:
+                        raise ValueError(f'{path}: unterminated item at character {offset + position}') from error
+
+                    fill()
+                    continue
+
+                yield MalformedRecord(
+                    buffer[position:end],
+                    f'Invalid JSON at character {offset + error.pos}: {error.msg}'
+                )
+                position = end
+                continue
+
+            position = end
+            yield record
+
+
+def read_ndjson(path: str) -> Iterator[Record]:
+
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+
+            if not line.strip():
+                continue
+
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                yield MalformedRecord(line.rstrip('\n'), f'Invalid JSON: {error}')
+
+
+def read_csv(path: str) -> Iterator[dict[str, Any]]:
+
+    with open(path, encoding='utf-8', newline='') as file:
+        yield from csv.DictReader(file)
+
+
+def _csv_lines(file: BinaryIO) -> Iterator[tuple[bytes, bool]]:
+    """Physical lines of a CSV file, each with whether it ends a record (no quoted field left open)"""
+
+    quoted = False
+
+    for line in file:
+        quoted ^= line.count(b'"') % 2 == 1
+        yield line, not quoted
+
+
+def csv_fieldnames(path: str) -> list[str]:
+
+    with open(path, encoding='utf-8', newline='') as file:
+        return next(csv.reader(file), [])
+
+
+def split_records(path: str, record_format: RecordFormat, chunk_size: int) -> Iterator[tuple[int, int]]:
+    """
+    Byte ranges of an NDJSON or CSV file holding chunk_size records each (the last one may hold fewer).
+
+    Only record boundaries are found here, the records themselves are decoded with `read_range`,
+    so the parsing can run in the worker that validates the chunk.
+    """
+
+    with open(path, 'rb') as file:
+
+        lines = _csv_lines(file) if record_format == 'csv' else ((line, True) for line in file)
+        position = 0
+        start = 0
+        records = 0
+
+        if record_format == 'csv':
+            # The header ends at the first line that closes its quotes
+            for line, complete in lines:
+                position += len(line)
+
+                if complete:
+                    break
+
+            start = position
+
+        for line, complete in lines:
+            position += len(line)
+
+            if complete and line.strip():
+                records += 1
+
+                if records == chunk_size:
+                    yield start, position
+                    start = position
+                    records = 0
+
+        if records:
+            yield start, position
+
+
+def read_range(
+    path: str,
+    record_format: RecordFormat,
+    start: int,
+    end: int,
+    fieldnames: Optional[list[str]] = None
+) -> Iterator[Record]:
+    """Decode the records of a byte range found by `split_records`, CSV ranges need the header fieldnames"""
+
+    with open(path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode('utf-8')
+
+    if record_format == 'csv':
+        yield from csv.DictReader(io.StringIO(text, newline=''), fieldnames=fieldnames)
+        return
+
+    # Only \n ends a record, JSON strings may hold other line separators such as U+2028
+    for line in text.split('\n'):
+
+        if not line.strip():
+            continue
+
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            yield MalformedRecord(line.rstrip('\r'), f'Invalid JSON: {error}')
+
+
+def read_records(path: str, record_format: Optional[RecordFormat] = None) -> Iterator[Record]:
+    """Stream the records of a JSON array, NDJSON or CSV file"""
+
+    readers = {
+        'json': read_json_array,
+        'ndjson': read_ndjson,
+        'csv': read_csv,
+    }
+
+    return readers[record_format or detect_format(path)](path)
@@ -0,0 +1,56 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from datetime import datetime
+from app import utils
+import asyncio, os, random, sys, uuid
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests that carry the profile header, or a random sample of them,
+    and writes one collapsed stack file per request in `directory`.
+
+    Only the request's own code is sampled, see SamplingProfiler for what that covers.
+    """
+
+    def __init__(self, app: ASGIApp, directory: str, header: str, sample_rate: float, interval: float):
+        self.app = app
+        self.directory = directory
+        self.header = header.lower()
+        self.sample_rate = sample_rate
+        self.interval = interval
+
+    def _should_profile(self, scope: Scope) -> bool:
+
+        if Headers(scope=scope).get(self.header, '').lower() in ('1', 'true', 'yes'):
+            return True
+
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+
+        if scope['type'] != 'http' or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        route = scope['path'].strip('/').replace('/', '_') or 'root'
+        filename = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{route}-{uuid.uuid4().hex[:8]}.folded"
+
+        async def send_with_profile(message: Message) -> None:
+
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message).append('X-Profile-File', filename)
+
+            await send(message)
+
+        # This coroutine's frame is on the loop thread's stack exactly while this request runs on it
+        profiler = utils.SamplingProfiler(self.interval, root=sys._getframe())
+        token = utils.start_profile(profiler)
+        profiler.start()
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profiler.stop()
+            utils.finish_profile(token)
+            await asyncio.to_thread(profiler.write_collapsed, os.path.join(self.directory, filename))
@@ -0,0 +1,51 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app import utils
+import logging, time
+
+logger = logging.getLogger(__name__)
+
+
+class TracingMiddleware:
+    """Collects the spans of every request and reports them in a Server-Timing header"""
+
+    def __init__(self, app: ASGIApp, slow_request_ms: float):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        token = utils.start_spans()
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+
+            if message['type'] == 'http.response.start':
+
+                spans = utils.current_spans()
+                total = utils.Span('total', (time.perf_counter() - started)*1000, 0)
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', utils.server_timing([*spans, total]))
+
+                level = logging.WARNING if total.wall_ms >= self.slow_request_ms else logging.DEBUG
+
+                if logger.isEnabledFor(level):
+                    logger.log(
+                        level,
+                        '%s %s took %.1fms: %s',
+                        scope['method'],
+                        scope['path'],
+                        total.wall_ms,
+                        ', '.join(f'{item.name}={item.wall_ms:.1f}ms (cpu {item.cpu_ms:.1f}ms)' for item in spans)
+                    )
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            utils.finish_spans(token)
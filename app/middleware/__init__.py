@@ -0,0 +1,6 @@
+"""
+Middleware package initialization
+"""
+
+from .__TracingMiddleware import TracingMiddleware
+from .__ProfilingMiddleware import ProfilingMiddleware
@@ -0,0 +1,316 @@
+from typing import Any, Iterable, Iterator, Optional
+from array import array
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from . import Point, Location, Plant
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Offset of the values that had no timezone, they are stored as if they were UTC
+_NAIVE_OFFSET = -32768
+
+
+def _to_epoch_microseconds(value: Any) -> tuple[int, int]:
+    """UTC instant of a date in microseconds and its UTC offset in minutes (_NAIVE_OFFSET when it had none)"""
+
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+
+    offset = value.utcoffset()
+
+    if offset is None:
+        return (value - _EPOCH)//_MICROSECOND, _NAIVE_OFFSET
+
+    return (value.replace(tzinfo=None) - offset - _EPOCH)//_MICROSECOND, offset//timedelta(minutes=1)
+
+
+def _to_datetime(microseconds: np.datetime64, offset: int) -> datetime:
+
+    value = _EPOCH + timedelta(microseconds=int(microseconds.astype(np.int64)))
+
+    if offset == _NAIVE_OFFSET:
+        return value
+
+    return (value + timedelta(minutes=offset)).replace(tzinfo=timezone(timedelta(minutes=offset)))
+
+
+def _to_float(value: np.float32) -> float:
+    # Shortest repr of the float32, so 368.41 comes back as 368.41 and not 368.4100036621094
+    return float(str(value))
+
+
+class _DictionaryColumn:
+    """
+    Dictionary encoded strings: one integer code per row and every distinct value
+    stored once as UTF-8 in a single buffer. Code -1 is None.
+    """
+
+    def __init__(self, codes: np.ndarray, blob: np.ndarray, offsets: np.ndarray):
+        self.codes = codes
+        self.blob = blob
+        self.offsets = offsets
+        self._lookup: Optional[dict[str, int]] = None
+
+    @staticmethod
+    def build(codes: array, values: Iterable[str]) -> '_DictionaryColumn':
+
+        encoded = [value.encode() for value in values]
+
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+
+        # Smallest signed type that fits every code and the -1 for None
+        code_type = np.min_scalar_type(-max(len(encoded), 1))
+
+        return _DictionaryColumn(
+            np.asarray(codes, dtype=np.int64).astype(code_type),
+            np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            offsets
+        )
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.blob.nbytes + self.offsets.nbytes
+
+    def value(self, code: int) -> Optional[str]:
+
+        if code < 0:
+            return None
+
+        return self.blob[self.offsets[code]:self.offsets[code + 1]].tobytes().decode()
+
+    def values(self) -> list[str]:
+        """Distinct values of the column"""
+        return [self.value(code) for code in range(len(self.offsets) - 1)] # type: ignore
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        return self.value(int(self.codes[index]))
+
+    def code(self, value: str) -> Optional[int]:
+        """Code of a value, the reverse lookup is built on first use"""
+
+        if self._lookup is None:
+            self._lookup = {value: code for code, value in enumerate(self.values())}
+
+        return self._lookup.get(value)
+
+    def mask(self, value: str) -> np.ndarray:
+
+        code = self.code(value)
+
+        if code is None:
+            return np.zeros(len(self.codes), dtype=bool)
+
+        return self.codes == code
+
+
+class PlantCatalog:
+    """
+    Struct-of-arrays storage for the plant catalog.
+
+    Numbers and dates live in typed numpy columns and strings are dictionary encoded, so a
+    catalog entry costs a few dozen bytes instead of a tree of Pydantic models. `Plant` models
+    are only built on demand, at the API boundary, with `plant(index)`.
+
+    Dates are UTC instants in datetime64[us]. The UTC offset of each value is only stored, as
+    minutes, for columns where some value carried one, so naive and aware dates both come back
+    as they were written. Heights and temperatures are float32, which keeps about 7 significant digits.
+    """
+
+    float_columns = ('max_height', 'initial_height', 'temperature_to_grow', 'growth_rate')
+    date_columns = ('created_at', 'updated_at', 'planting_date')
+    string_columns = ('scientific_name', 'common_name', 'description', 'bloom_season', 'country_code', 'location_name')
+    location_columns = ('country_code', 'location_name')
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        floats: dict[str, np.ndarray],
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        dates: dict[str, np.ndarray],
+        date_offsets: dict[str, Optional[np.ndarray]],
+        strings: dict[str, _DictionaryColumn]
+    ):
+        self.ids = ids
+        self.floats = floats
+        self.latitude = latitude
+        self.longitude = longitude
+        self.dates = dates
+        self.date_offsets = date_offsets
+        self.strings = strings
+        self._id_order: Optional[np.ndarray] = None
+
+    @staticmethod
+    def from_records(records: Iterable[dict[str, Any]]) -> 'PlantCatalog':
+        """Build the catalog from raw catalog records (as stored in CATALOG_PATH) in a single pass"""
+
+        ids = array('q')
+        floats = {name: array('f') for name in PlantCatalog.float_columns}
+        latitude = array('d')
+        longitude = array('d')
+        dates = {name: array('q') for name in PlantCatalog.date_columns}
+        date_offsets = {name: array('h') for name in PlantCatalog.date_columns}
+        codes = {name: array('q') for name in PlantCatalog.string_columns}
+        values: dict[str, dict[str, int]] = {name: {} for name in PlantCatalog.string_columns}
+
+        for record in records:
+
+            location = record.get('location') or {}
+            coords = location.get('coords') or {}
+
+            ids.append(int(record['id']))
+            latitude.append(float(coords['latitude']))
+            longitude.append(float(coords['longitude']))
+
+            for name in PlantCatalog.float_columns:
+                floats[name].append(float(record[name]))
+
+            for name in PlantCatalog.date_columns:
+                microseconds, offset = _to_epoch_microseconds(record[name])
+                dates[name].append(microseconds)
+                date_offsets[name].append(offset)
+
+            for name in PlantCatalog.string_columns:
+                value = (location if name in PlantCatalog.location_columns else record).get(name)
+                codes[name].append(-1 if value is None else values[name].setdefault(value, len(values[name])))
+
+        return PlantCatalog(
+            np.asarray(ids, dtype=np.int64),
+            {name: np.asarray(column, dtype=np.float32) for name, column in floats.items()},
+            np.asarray(latitude, dtype=np.float64),
+            np.asarray(longitude, dtype=np.float64),
+            {name: np.asarray(column, dtype=np.int64).view('datetime64[us]') for name, column in dates.items()},
+            {
+                name: offsets if np.any(offsets != _NAIVE_OFFSET) else None
+                for name, offsets in ((name, np.asarray(column, dtype=np.int16)) for name, column in date_offsets.items())
+            },
+            {name: _DictionaryColumn.build(codes[name], values[name]) for name in PlantCatalog.string_columns}
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the columns"""
+
+        return (
+            self.ids.nbytes
+            + self.latitude.nbytes
+            + self.longitude.nbytes
+            + sum(column.nbytes for column in self.floats.values())
+            + sum(column.nbytes for column in self.dates.values())
+            + sum(column.nbytes for column in self.date_offsets.values() if column is not None)
+            + sum(column.nbytes for column in self.strings.values())
+        )
+
+    def index_of(self, plant_id: int) -> Optional[int]:
+        """Row of a plant id, through a sorted id index built on first use"""
+
+        if self._id_order is None:
+            self._id_order = np.argsort(self.ids, kind='stable')
+
+        position = int(np.searchsorted(self.ids, plant_id, sorter=self._id_order))
+
+        if position < len(self.ids) and self.ids[self._id_order[position]] == plant_id:
+            return int(self._id_order[position])
+
+        return None
+
+    def where(
+        self,
+        bloom_season: Optional[str] = None,
+        country_code: Optional[str] = None,
+        scientific_name: Optional[str] = None,
+        bbox: Optional[tuple[float, float, float, float]] = None
+    ) -> np.ndarray:
+        """
+        Rows matching every given filter, evaluated as vectorized column scans.
+
+        Args:
+            bbox (tuple): (min_latitude, min_longitude, max_latitude, max_longitude).
+        """
+
+        mask = np.ones(len(self), dtype=bool)
+
+        for name, value in (
+            ('bloom_season', bloom_season),
+            ('country_code', country_code),
+            ('scientific_name', scientific_name)
+        ):
+            if value is not None:
+                mask &= self.strings[name].mask(value)
+
+        if bbox is not None:
+            min_latitude, min_longitude, max_latitude, max_longitude = bbox
+            mask &= (
+                (self.latitude >= min_latitude) & (self.latitude <= max_latitude)
+                & (self.longitude >= min_longitude) & (self.longitude <= max_longitude)
+            )
+
+        return np.flatnonzero(mask)
+
+    def date(self, name: str, index: int) -> datetime:
+        """Date of a row as written, with its original UTC offset if it had one"""
+
+        offsets = self.date_offsets[name]
+
+        return _to_datetime(self.dates[name][index], _NAIVE_OFFSET if offsets is None else int(offsets[index]))
+
+    def record(self, index: int) -> dict[str, Any]:
+        """Row as a plain dict with the same shape as the catalog file"""
+
+        return {
+            'id': int(self.ids[index]),
+            'scientific_name': self.strings['scientific_name'][index],
+            'common_name': self.strings['common_name'][index],
+            'description': self.strings['description'][index],
+            **{name: _to_float(self.floats[name][index]) for name in self.float_columns},
+            'bloom_season': self.strings['bloom_season'][index],
+            **{name: str(self.date(name, index)) for name in self.date_columns},
+            'location': {
+                'country_code': self.strings['country_code'][index],
+                'location_name': self.strings['location_name'][index],
+                'coords': {
+                    'latitude': float(self.latitude[index]),
+                    'longitude': float(self.longitude[index])
+                }
+            }
+        }
+
+    def records(self, indexes: Optional[Iterable[int]] = None) -> Iterator[dict[str, Any]]:
+
+        for index in range(len(self)) if indexes is None else indexes:
+            yield self.record(int(index))
+
+    def plant(self, index: int) -> Plant:
+        """Lightweight Plant view of a row, built without re-validating the stored data"""
+
+        return Plant.model_construct(
+            id=int(self.ids[index]),
+            scientific_name=self.strings['scientific_name'][index],
+            common_name=self.strings['common_name'][index],
+            description=self.strings['description'][index],
+            **{name: _to_float(self.floats[name][index]) for name in self.float_columns},
+            bloom_season=self.strings['bloom_season'][index],
+            **{name: self.date(name, index) for name in self.date_columns},
+            location=Location.model_construct(
+                country_code=self.strings['country_code'][index],
+                location_name=self.strings['location_name'][index],
+                coords=Point.model_construct(
+                    latitude=float(self.latitude[index]),
+                    longitude=float(self.longitude[index])
+                )
+            )
+        )
+
+    def plants(self, indexes: Optional[Iterable[int]] = None) -> Iterator[Plant]:
+
+        for index in range(len(self)) if indexes is None else indexes:
+            yield self.plant(int(index))
@@ -7,4 +7,4 @@ class Point(BaseModel):
     
     # Geographic data
     latitude: float = Field(..., ge=-90, le=90, description="Point Latitude")
-    longitude: float = Field(..., ge=-90, le=90, description="Point longitude")
\ No newline at end of file
+    longitude: float = Field(..., ge=-180, le=180, description="Point longitude")
\ No newline at end of file
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+from datetime import datetime
+from . import Plant
+from app.ptypes import JobStatus
+
+
+class PredictionJobRequest(BaseModel):
+    plants: List[Plant] = Field(..., min_length=1, description='Plants to run the prediction for')
+
+
+class PredictionJob(BaseModel):
+    id: str
+    status: JobStatus
+    total: int
+    completed: int = 0
+    failed: int = 0
+    created_at: datetime
+    updated_at: datetime
+    error: Optional[str] = None
+
+
+class PredictionJobResult(BaseModel):
+    index: int
+    plant_id: int
+    prediction: Optional[Any] = None
+    error: Optional[str] = None
+
+
+class PredictionJobResultsPage(BaseModel):
+    job_id: str
+    page: int
+    per_page: int
+    total: int
+    results: List[PredictionJobResult] = []
@@ -5,5 +5,7 @@ Models package initialization
 from ._Point import Point
 from ._Location import Location
 from ._Plant import *
+from ._PlantCatalog import PlantCatalog
 from .__PerenualSpeciesRequest import *
-from ._PerenualPlantDetail import *
\ No newline at end of file
+from ._PerenualPlantDetail import *
+from ._PredictionJob import *
\ No newline at end of file
@@ -0,0 +1,3 @@
+from typing import Literal
+
+JobStatus = Literal['queued', 'running', 'done', 'failed']
@@ -1,2 +1,3 @@
 
-from .__Station import Station
\ No newline at end of file
+from .__Station import Station
+from .__JobStatus import JobStatus
\ No newline at end of file
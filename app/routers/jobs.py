@@ -0,0 +1,61 @@
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from app.models import PredictionJob, PredictionJobRequest, PredictionJobResultsPage
+from app.services import JobStore, PredictionJobService
+from app.config import settings
+
+router = APIRouter(prefix="/predict/jobs")
+prediction_job_service = PredictionJobService(
+    JobStore(settings.JOBS_DB_PATH),
+    workers=settings.PREDICTION_JOB_WORKERS,
+    concurrency=settings.PREDICTION_JOB_CONCURRENCY,
+    poll_interval=settings.PREDICTION_JOB_POLL_INTERVAL,
+    lease=settings.PREDICTION_JOB_LEASE
+)
+
+async def _get_job_or_404(job_id: str) -> PredictionJob:
+    
+    job = await prediction_job_service.get(job_id)
+    
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found"
+        )
+    
+    return job
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def create_prediction_job(request: PredictionJobRequest) -> PredictionJob:
+    """Enqueue a prediction run over a set of plants"""
+    return await prediction_job_service.submit(request.plants)
+
+@router.get("/{job_id}")
+async def get_prediction_job(job_id: str) -> PredictionJob:
+    """Get the status and progress of a prediction job"""
+    return await _get_job_or_404(job_id)
+
+@router.get("/{job_id}/results")
+async def get_prediction_job_results(
+    job_id: str,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(settings.PREDICTION_JOB_PAGE_SIZE, ge=1, le=500)
+) -> PredictionJobResultsPage:
+    """Get the results of a prediction job, completed or partial, in pages"""
+    
+    await _get_job_or_404(job_id)
+    
+    return await prediction_job_service.results(job_id, page, per_page)
+
+@router.get("/{job_id}/events")
+async def stream_prediction_job(job_id: str) -> StreamingResponse:
+    """Stream the progress and partial results of a prediction job as Server-Sent Events"""
+    
+    await _get_job_or_404(job_id)
+    
+    return StreamingResponse(
+        prediction_job_service.events(job_id),
+        media_type="text/event-stream",
+        # An explicit encoding keeps GZipMiddleware from buffering the events
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity", "X-Accel-Buffering": "no"}
+    )
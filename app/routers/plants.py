@@ -1,37 +1,83 @@
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import List, Any
+from fastapi import APIRouter, HTTPException, Request, Response, status, Query
+from typing import List, Any, Optional
+from datetime import datetime
 from app.models._Plant import Plant
 from app.services.__PlantService import PlantService
 from app.models import PerenualSpeciesRequest, Datum
+from app.config import settings
+from app import utils
 
 router = APIRouter()
+
 plant_service = PlantService()
 
+# Routes here are plain `def` on purpose: catalog loads, serialization, compression and upstream
+# calls are blocking, so FastAPI runs them in its threadpool instead of on the event loop
+
 @router.get("/plants", response_model=List[Plant])
-async def get_plants() -> List[Plant]:
+def get_plants(request: Request) -> Response:
     """Get all plants"""
-    return plant_service.get_plants()
+    
+    version, last_modified = plant_service.catalog_version()
+    catalog = plant_service.get_catalog()
+    
+    return utils.cached_json_response(
+        request,
+        lambda: list(catalog.records()),
+        version=version,
+        last_modified=last_modified,
+        cache_control=settings.CACHE_CONTROL_PLANTS
+    )
 
-@router.get("/plant")
-async def get_plant(plant_id: int = Query(..., ge=1)) -> Plant:
+@router.get("/plants/blooming", response_model=List[Plant])
+def get_blooming_plants(
+    request: Request,
+    month: Optional[int] = Query(None, ge=1, le=12, description="Month number, the current month by default"),
+    country: Optional[str] = Query(None, min_length=2, max_length=3, description="Country code of the plant location")
+) -> Response:
+    """Get the plants blooming in a month, with seasons adjusted to each plant's hemisphere"""
+    
+    month = month or datetime.now().month
+    version, last_modified = plant_service.catalog_version()
+    calendar = plant_service.get_bloom_calendar()
+    rows = calendar.blooming(month, country)
+    
+    return utils.cached_json_response(
+        request,
+        lambda: list(calendar.catalog.records(rows)),
+        version=(*version, month, country),
+        last_modified=last_modified,
+        cache_control=settings.CACHE_CONTROL_PLANTS
+    )
+
+@router.get("/plant", response_model=Plant)
+def get_plant(request: Request, plant_id: int = Query(..., ge=1)) -> Response:
     """Get a plant by its ID"""
-    plants = plant_service.get_plants()
     
-    for plant in plants:
-        if plant == plant_id:
-            return plant
+    version, last_modified = plant_service.catalog_version()
+    catalog = plant_service.get_catalog()
+    index = catalog.index_of(plant_id)
     
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail=f"Plant with ID {plant_id} not found"
+    if index is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Plant with ID {plant_id} not found"
+        )
+    
+    return utils.cached_json_response(
+        request,
+        lambda: catalog.record(index),
+        version=(*version, plant_id),
+        last_modified=last_modified,
+        cache_control=settings.CACHE_CONTROL_PLANTS
     )
 
-@router.get("/predictions")
-async def get_predictions() -> List[Datum]:
+@router.get("/predictions", response_model=List[Datum])
+def get_predictions(request: Request) -> Response:
     "Get all predictions"
     
     
-    answer = PlantService.get_plants_prediction()
+    answer, digest, modified_at = PlantService.get_cached_plants_prediction()
     
     if len(answer.data) == 0:
         raise HTTPException(
@@ -39,9 +85,24 @@ async def get_predictions() -> List[Datum]:
             detail="No predictions found"
         )
     
-    return answer.data
+    return utils.cached_json_response(
+        request,
+        lambda: [datum.model_dump(mode='json') for datum in answer.data],
+        version=(digest,),
+        last_modified=modified_at,
+        cache_control=settings.CACHE_CONTROL_PREDICTIONS
+    )
 
 @router.get('/predict')
-async def predict_growth(scientific_name: str = Query(...)) -> Any:
+def predict_growth(scientific_name: str = Query(...)) -> Any:
+    """Get the growth prediction of a catalog plant by its scientific name"""
+    
+    plant = plant_service.find_plant(scientific_name)
+    
+    if plant is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Plant {scientific_name} not found"
+        )
     
-    pass
\ No newline at end of file
+    return PlantService.get_prediction(plant)
@@ -0,0 +1,264 @@
+from typing import Any, Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import product
+from urllib.parse import urlencode
+from .__ObservationStore import ObservationStore
+import hashlib, json, logging, math, os, threading, time, requests
+
+logger = logging.getLogger(__name__)
+
+BBox = tuple[float, float, float, float]
+
+# iNaturalist annotation "Plant Phenology" (term 12) = "Flowering" (value 13)
+FLOWERING_PARAMS = {'term_id': '12', 'term_value_id': '13'}
+
+
+def taxon_name(scientific_name: str) -> str:
+    """Binomial used to query iNaturalist, catalog names carry authors and subspecies"""
+    return ' '.join(scientific_name.split()[:2])
+
+
+def tile_bbox(bbox: BBox, tile_size: float) -> list[BBox]:
+    """Split a (swlat, swlng, nelat, nelng) bounding box into tiles of at most tile_size degrees"""
+
+    swlat, swlng, nelat, nelng = bbox
+
+    return [
+        (
+            round(swlat + row*tile_size, 6),
+            round(swlng + column*tile_size, 6),
+            round(min(swlat + (row + 1)*tile_size, nelat), 6),
+            round(min(swlng + (column + 1)*tile_size, nelng), 6)
+        )
+        for row in range(max(math.ceil((nelat - swlat)/tile_size), 1))
+        for column in range(max(math.ceil((nelng - swlng)/tile_size), 1))
+    ]
+
+
+def page_key(params: dict[str, Any]) -> str:
+    """Stable name of a recorded page, shared with the stub server that replays them"""
+    return hashlib.sha1(urlencode(sorted((key, str(value)) for key, value in params.items())).encode()).hexdigest()
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds asked by a Retry-After header, given as seconds or as an HTTP date"""
+
+    value = response.headers.get('Retry-After')
+
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Spaces the requests of every thread sharing it at least 1/rate seconds apart"""
+
+    def __init__(self, rate: float):
+        self.interval = 1/rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+
+        time.sleep(slot - now)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every thread back, e.g. after the server throttled one of them"""
+
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+def _parse_observation(raw: dict[str, Any]) -> Optional[dict[str, Any]]:
+
+    observed_on = raw.get('observed_on')
+    coordinates = (raw.get('geojson') or {}).get('coordinates')
+
+    if coordinates:
+        longitude, latitude = coordinates[:2]
+    elif raw.get('location'):
+        latitude, longitude = (float(value) for value in raw['location'].split(','))
+    else:
+        return None
+
+    if not observed_on:
+        return None
+
+    return {'id': raw['id'], 'coords': (float(latitude), float(longitude)), 'observed_on': observed_on}
+
+
+class INaturalistService:
+    """Pages flowering observations out of the iNaturalist API, tile by tile and taxon by taxon"""
+
+    def __init__(
+        self,
+        store: ObservationStore,
+        url: str,
+        per_page: int = 200,
+        workers: int = 4,
+        record_dir: Optional[str] = None,
+        rate: float = 1.0,
+        retries: int = 6,
+        backoff: float = 2.0,
+        throttled_backoff: float = 30.0,
+        max_backoff: float = 300.0
+    ):
+        self.store = store
+        self.url = url
+        self.per_page = per_page
+        self.workers = workers
+        self.record_dir = record_dir
+        self.retries = retries
+        self.backoff = backoff
+        self.throttled_backoff = throttled_backoff
+        self.max_backoff = max_backoff
+        self._limiter = RateLimiter(rate)
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+
+        return self._local.session
+
+    def _get_page(self, params: dict[str, Any]) -> dict[str, Any]:
+        """
+        Fetch a page through the shared rate limiter.
+
+        Connection errors, timeouts and 5xx answers are retried with exponential backoff. A 429
+        waits for its Retry-After, or a longer backoff, and holds back every worker meanwhile.
+        """
+
+        for attempt in range(self.retries + 1):
+
+            self._limiter.wait()
+
+            try:
+                response = self._session().get(f'{self.url}observations', params=params, timeout=30)
+            except (requests.ConnectionError, requests.Timeout) as error:
+
+                if attempt == self.retries:
+                    raise
+
+                delay = min(self.backoff*2**attempt, self.max_backoff)
+                logger.warning('iNaturalist request failed (%s), retrying in %.0fs', error, delay)
+                time.sleep(delay)
+                continue
+
+            if response.status_code == 429 and attempt < self.retries:
+                delay = _retry_after(response)
+                delay = min(self.throttled_backoff*2**attempt if delay is None else delay, self.max_backoff)
+                logger.warning('iNaturalist throttled the ingestion, pausing %.0fs', delay)
+                self._limiter.pause(delay)
+                continue
+
+            if response.status_code in (500, 502, 503, 504) and attempt < self.retries:
+                delay = min(self.backoff*2**attempt, self.max_backoff)
+                logger.warning('iNaturalist answered %d, retrying in %.0fs', response.status_code, delay)
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            break
+
+        if self.record_dir:
+            os.makedirs(self.record_dir, exist_ok=True)
+
+            with open(os.path.join(self.record_dir, f'{page_key(params)}.json'), 'w', encoding='utf-8') as file:
+                file.write(response.text)
+
+        return json.loads(response.text)
+
+    def fetch_tile(self, taxon: str, tile: BBox) -> int:
+        """
+        Page through the flowering observations of a taxon inside a tile.
+
+        Pages are requested by ascending id with `id_above`, which avoids the deep paging limit of the
+        API and lets an interrupted ingestion resume after the last stored id.
+
+        Returns:
+            int: Number of new observations stored.
+        """
+
+        key = ','.join(str(value) for value in tile)
+        last_id, finished = self.store.cursor(taxon, key)
+        added = 0
+
+        while not finished:
+
+            swlat, swlng, nelat, nelng = tile
+            page = self._get_page({
+                **FLOWERING_PARAMS,
+                'taxon_name': taxon,
+                'swlat': swlat,
+                'swlng': swlng,
+                'nelat': nelat,
+                'nelng': nelng,
+                'verifiable': 'true',
+                'order_by': 'id',
+                'order': 'asc',
+                'id_above': last_id,
+                'per_page': self.per_page,
+            })
+
+            results = page.get('results', [])
+
+            if results:
+                last_id = max(result['id'] for result in results)
+
+            finished = len(results) < self.per_page
+            observations = (parsed for result in results if (parsed := _parse_observation(result)))
+            added += self.store.add_observations(taxon, key, observations, last_id, finished)
+
+        return added
+
+    def ingest(self, taxa: Iterable[str], bbox: BBox, tile_size: float) -> int:
+        """
+        Fetch every (taxon, tile) pair of a region concurrently, returns the new observations stored.
+
+        A pair that still fails after the retries is logged and skipped, the rest of the run goes on
+        and running it again resumes that pair from its stored cursor.
+        """
+
+        tasks = list(product(sorted(set(taxa)), tile_bbox(bbox, tile_size)))
+        added = 0
+        failed = 0
+
+        logger.info('Fetching %d taxa x tiles with %d workers', len(tasks), self.workers)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            futures = [executor.submit(self.fetch_tile, taxon, tile) for taxon, tile in tasks]
+
+            for (taxon, tile), future in zip(tasks, futures):
+                try:
+                    count = future.result()
+                except requests.RequestException as error:
+                    failed += 1
+                    logger.error('%s %s: %s', taxon, tile, error)
+                    continue
+
+                added += count
+                logger.debug('%s %s: %d new observations', taxon, tile, count)
+
+        if failed:
+            logger.warning('%d of %d taxa x tiles failed, run the ingestion again to resume them', failed, len(tasks))
+
+        return added
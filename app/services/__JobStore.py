@@ -0,0 +1,247 @@
+from typing import Iterator, Optional
+from datetime import datetime, timezone
+from threading import Lock
+from app.models import Plant, PredictionJob, PredictionJobResult
+from app.ptypes import JobStatus
+import json, os, sqlite3, time, uuid
+
+
+class JobStore:
+    """
+    SQLite storage for prediction jobs, their input plants and their results.
+
+    The database is shared by every server process. A process only runs a job after claiming
+    it and keeps it by renewing a lease, a job whose lease expired (its process died) can be
+    claimed again by any process.
+    """
+
+    def __init__(self, path: str):
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = Lock()
+
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(
+                '''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    completed INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    error TEXT,
+                    owner TEXT,
+                    lease_until REAL
+                );
+                CREATE TABLE IF NOT EXISTS job_plants (
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    plant TEXT NOT NULL,
+                    PRIMARY KEY (job_id, idx)
+                );
+                CREATE TABLE IF NOT EXISTS job_results (
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    plant_id INTEGER NOT NULL,
+                    prediction TEXT,
+                    error TEXT,
+                    PRIMARY KEY (job_id, idx)
+                );
+                '''
+            )
+
+            # Databases created before jobs were claimed by a process
+            columns = {row['name'] for row in self._connection.execute('PRAGMA table_info(jobs)')}
+
+            for column, column_type in (('owner', 'TEXT'), ('lease_until', 'REAL')):
+                if column not in columns:
+                    self._connection.execute(f'ALTER TABLE jobs ADD COLUMN {column} {column_type}')
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> PredictionJob:
+        return PredictionJob(**{key: row[key] for key in PredictionJob.model_fields})
+
+    @staticmethod
+    def _to_result(row: sqlite3.Row) -> PredictionJobResult:
+
+        return PredictionJobResult(
+            index=row['idx'],
+            plant_id=row['plant_id'],
+            prediction=json.loads(row['prediction']) if row['prediction'] else None,
+            error=row['error']
+        )
+
+    def create(self, plants: list[Plant]) -> PredictionJob:
+
+        job_id = uuid.uuid4().hex
+        now = self._now()
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT INTO jobs (id, status, total, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (job_id, 'queued', len(plants), now, now)
+            )
+            self._connection.executemany(
+                'INSERT INTO job_plants (job_id, idx, plant) VALUES (?, ?, ?)',
+                ((job_id, index, plant.model_dump_json()) for index, plant in enumerate(plants))
+            )
+
+        return self.get(job_id) # type: ignore
+
+    def get(self, job_id: str) -> Optional[PredictionJob]:
+
+        with self._lock:
+            row = self._connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+        return self._to_job(row) if row else None
+
+    def claim(self, owner: str, lease: float) -> Optional[str]:
+        """
+        Atomically take the oldest queued job, or a running one whose lease expired, for a process.
+
+        Returns:
+            str: Id of the claimed job, None when there is nothing to run.
+        """
+
+        now = time.time()
+
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                '''
+                UPDATE jobs SET status = 'running', owner = ?, lease_until = ?, updated_at = ?
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status = 'queued' OR (status = 'running' AND (lease_until IS NULL OR lease_until < ?))
+                    ORDER BY created_at
+                    LIMIT 1
+                )
+                RETURNING id
+                ''',
+                (owner, now + lease, self._now(), now)
+            ).fetchone()
+
+        return row['id'] if row else None
+
+    def renew(self, owner: str, lease: float) -> None:
+        """Extend the lease of every job a process is running"""
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = 'running'",
+                (time.time() + lease, owner)
+            )
+
+    def set_status(self, job_id: str, status: JobStatus, error: Optional[str] = None) -> None:
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?',
+                (status, error, self._now(), job_id)
+            )
+
+    def release(self, owner: str) -> None:
+        """Queue again the jobs a stopping process was running"""
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE owner = ? AND status = 'running'",
+                (self._now(), owner)
+            )
+
+    def pending_plants(self, job_id: str) -> Iterator[tuple[int, Plant]]:
+        """Input plants of a job that don't have a result yet"""
+
+        with self._lock:
+            rows = self._connection.execute(
+                '''
+                SELECT p.idx, p.plant FROM job_plants p
+                LEFT JOIN job_results r ON r.job_id = p.job_id AND r.idx = p.idx
+                WHERE p.job_id = ? AND r.idx IS NULL
+                ORDER BY p.idx
+                ''',
+                (job_id,)
+            ).fetchall()
+
+        for row in rows:
+            yield row['idx'], Plant.model_validate_json(row['plant'])
+
+    def add_result(self, job_id: str, result: PredictionJobResult) -> PredictionJob:
+
+        column = 'failed' if result.error else 'completed'
+
+        with self._lock, self._connection:
+            # A result already stored by another process (a job resumed after its lease expired) isn't counted twice
+            inserted = self._connection.execute(
+                'INSERT OR IGNORE INTO job_results (job_id, idx, plant_id, prediction, error) VALUES (?, ?, ?, ?, ?)',
+                (
+                    job_id,
+                    result.index,
+                    result.plant_id,
+                    json.dumps(result.prediction, default=str),
+                    result.error
+                )
+            ).rowcount
+
+            if inserted:
+                self._connection.execute(
+                    f'UPDATE jobs SET {column} = {column} + 1, updated_at = ? WHERE id = ?',
+                    (self._now(), job_id)
+                )
+
+        return self.get(job_id) # type: ignore
+
+    def results(self, job_id: str, page: int, per_page: int) -> list[PredictionJobResult]:
+
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT * FROM job_results WHERE job_id = ? ORDER BY idx LIMIT ? OFFSET ?',
+                (job_id, per_page, (page - 1)*per_page)
+            ).fetchall()
+
+        return [self._to_result(row) for row in rows]
+
+    def results_after(self, job_id: str, cursor: int) -> tuple[list[PredictionJobResult], int]:
+        """
+        Results stored after a cursor, in completion order.
+
+        Returns:
+            tuple: The new results and the cursor for the next call.
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT rowid, * FROM job_results WHERE job_id = ? AND rowid > ? ORDER BY rowid',
+                (job_id, cursor)
+            ).fetchall()
+
+        return [self._to_result(row) for row in rows], rows[-1]['rowid'] if rows else cursor
+
+    def last_result(self) -> int:
+        """Cursor of the latest stored result, for results_after"""
+
+        with self._lock:
+            return self._connection.execute('SELECT COALESCE(MAX(rowid), 0) FROM job_results').fetchone()[0]
+
+    def count_results(self, job_id: str) -> int:
+
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM job_results WHERE job_id = ?', (job_id,)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+
+        with self._lock:
+            self._connection.close()
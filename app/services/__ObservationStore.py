@@ -0,0 +1,148 @@
+from typing import Any, Iterable, Optional
+from collections import Counter
+from datetime import date
+from threading import Lock
+import math, os, sqlite3
+
+
+class ObservationStore:
+    """SQLite storage for iNaturalist flowering observations and the phenology index built from them"""
+
+    def __init__(self, path: str):
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = Lock()
+
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(
+                '''
+                CREATE TABLE IF NOT EXISTS observations (
+                    id INTEGER PRIMARY KEY,
+                    taxon_name TEXT NOT NULL,
+                    latitude REAL NOT NULL,
+                    longitude REAL NOT NULL,
+                    observed_on TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS ingestion_cursors (
+                    taxon_name TEXT NOT NULL,
+                    tile TEXT NOT NULL,
+                    last_id INTEGER NOT NULL,
+                    finished INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (taxon_name, tile)
+                );
+                CREATE TABLE IF NOT EXISTS phenology (
+                    taxon_name TEXT NOT NULL,
+                    cell_lat INTEGER NOT NULL,
+                    cell_lon INTEGER NOT NULL,
+                    week INTEGER NOT NULL,
+                    observations INTEGER NOT NULL,
+                    PRIMARY KEY (taxon_name, cell_lat, cell_lon, week)
+                );
+                CREATE TABLE IF NOT EXISTS phenology_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                '''
+            )
+
+    def add_observations(self, taxon_name: str, tile: str, observations: Iterable[dict[str, Any]], last_id: int, finished: bool) -> int:
+        """Store a page of observations (duplicates by id are ignored) and move the tile cursor past it"""
+
+        rows = [
+            (observation['id'], taxon_name, *observation['coords'], observation['observed_on'])
+            for observation in observations
+        ]
+
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO observations (id, taxon_name, latitude, longitude, observed_on) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            added = self._connection.total_changes - before
+            self._connection.execute(
+                'INSERT OR REPLACE INTO ingestion_cursors (taxon_name, tile, last_id, finished) VALUES (?, ?, ?, ?)',
+                (taxon_name, tile, last_id, int(finished))
+            )
+
+        return added
+
+    def cursor(self, taxon_name: str, tile: str) -> tuple[int, bool]:
+        """Last stored observation id of a tile and whether the tile was fully paged"""
+
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT last_id, finished FROM ingestion_cursors WHERE taxon_name = ? AND tile = ?',
+                (taxon_name, tile)
+            ).fetchone()
+
+        return (row[0], bool(row[1])) if row else (0, False)
+
+    def build_phenology(self, cell_size: float) -> int:
+        """
+        Rebuild the per taxon, per cell, per ISO week count of flowering observations.
+
+        Returns:
+            int: Number of (taxon, cell, week) entries in the index.
+        """
+
+        counts: Counter[tuple[str, int, int, int]] = Counter()
+
+        with self._lock:
+            rows = self._connection.execute('SELECT taxon_name, latitude, longitude, observed_on FROM observations')
+
+            for taxon_name, latitude, longitude, observed_on in rows:
+                counts[(
+                    taxon_name,
+                    math.floor(latitude/cell_size),
+                    math.floor(longitude/cell_size),
+                    date.fromisoformat(observed_on[:10]).isocalendar().week
+                )] += 1
+
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM phenology')
+            self._connection.executemany(
+                'INSERT INTO phenology (taxon_name, cell_lat, cell_lon, week, observations) VALUES (?, ?, ?, ?, ?)',
+                ((*key, count) for key, count in counts.items())
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO phenology_meta (key, value) VALUES ('cell_size', ?)",
+                (str(cell_size),)
+            )
+
+        return len(counts)
+
+    def bloom_weeks(self, taxon_name: str, latitude: float, longitude: float) -> Optional[dict[int, int]]:
+        """Observed flowering per ISO week in the cell of a point, None when the index wasn't built"""
+
+        with self._lock:
+            meta = self._connection.execute("SELECT value FROM phenology_meta WHERE key = 'cell_size'").fetchone()
+
+            if meta is None:
+                return None
+
+            cell_size = float(meta[0])
+            rows = self._connection.execute(
+                '''
+                SELECT week, observations FROM phenology
+                WHERE taxon_name = ? AND cell_lat = ? AND cell_lon = ?
+                ORDER BY week
+                ''',
+                (taxon_name, math.floor(latitude/cell_size), math.floor(longitude/cell_size))
+            ).fetchall()
+
+        return {week: observations for week, observations in rows}
+
+    def count(self) -> int:
+
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM observations').fetchone()[0]
+
+    def close(self) -> None:
+
+        with self._lock:
+            self._connection.close()
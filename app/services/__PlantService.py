@@ -1,38 +1,109 @@
-from typing import List, Optional
+from typing import Optional
 from datetime import datetime
 import pandas as pd
 import numpy as np
 from geopy.distance import geodesic
 from app.models import (
     PerenualPlantDetail,
-    Plant
+    Plant,
+    PlantCatalog
 )
-import json, requests, datetime
+from app.ingestion import read_records
+import hashlib, json, requests, datetime, os
 from . import (
     PerenualSpeciesRequest,
     APIs,
     API,
     Datum
 )
+from .__ObservationStore import ObservationStore
+from .__INaturalistService import taxon_name
 from app import utils
+from app.config import settings
 from typing import Any
 
 class PlantService:
-    """Service for managing plants (in-memory storage for demonstration)"""
+    """Service for managing plants, backed by the columnar catalog"""
     
-    plants: List[Plant] = []
+    # Columnar catalog, reloaded only when the file on disk changes
+    _catalog: Optional[PlantCatalog] = None
+    _catalog_version: Optional[tuple[int, int]] = None
+    _bloom_calendar: Optional[utils.BloomCalendar] = None
+    
+    # Local iNaturalist phenology index, opened on first use
+    _observations: Optional[ObservationStore] = None
+    
+    # Upstream species list, reused for PREDICTIONS_CACHE_TTL seconds. Its digest and modification
+    # date only change when a refresh brings different data
+    _predictions: Optional[PerenualSpeciesRequest] = None
+    _predictions_fetched_at: Optional[datetime.datetime] = None
+    _predictions_digest: Optional[str] = None
+    _predictions_modified_at: Optional[datetime.datetime] = None
     
     def __init__(self):
         pass
     
     @staticmethod
-    def get_plants() -> list[Plant]:
+    def catalog_version() -> tuple[tuple[int, int], datetime.datetime]:
+        """Return the catalog version (mtime, size) and its last modification date"""
+        
+        stat = os.stat(settings.CATALOG_PATH)
+        
+        return (
+            (stat.st_mtime_ns, stat.st_size),
+            datetime.datetime.fromtimestamp(stat.st_mtime, tz=datetime.timezone.utc)
+        )
+    
+    @staticmethod
+    def get_catalog() -> PlantCatalog:
+        """Return the catalog, streaming it again from CATALOG_PATH if the file changed"""
+        
+        version, _ = PlantService.catalog_version()
+        
+        if PlantService._catalog is None or version != PlantService._catalog_version:
+            with utils.span('catalog_load'):
+                PlantService._catalog = PlantCatalog.from_records(read_records(settings.CATALOG_PATH)) # type: ignore
+            PlantService._catalog_version = version
+            PlantService._bloom_calendar = None
+        
+        return PlantService._catalog
+    
+    @staticmethod
+    def get_bloom_calendar() -> utils.BloomCalendar:
+        """Return the bloom calendar of the current catalog, built once per catalog version"""
+        
+        catalog = PlantService.get_catalog()
+        
+        if PlantService._bloom_calendar is None or PlantService._bloom_calendar.catalog is not catalog:
+            PlantService._bloom_calendar = utils.BloomCalendar(catalog)
+        
+        return PlantService._bloom_calendar
+    
+    @staticmethod
+    def find_plant(scientific_name: str) -> Optional[Plant]:
+        """Search the catalog for a plant by its exact scientific name"""
+        
+        catalog = PlantService.get_catalog()
+        indexes = catalog.where(scientific_name=scientific_name)
         
-        with open('data/examples/plants_data.json') as file:
+        return catalog.plant(indexes[0]) if len(indexes) else None
+    
+    @staticmethod
+    def observed_bloom_weeks(flower: Plant) -> Optional[dict[int, int]]:
+        """Flowering observations per ISO week near the plant, from the precomputed phenology index"""
+        
+        if PlantService._observations is None:
             
-            data: list[Plant] = json.loads(file.read())
+            if not os.path.exists(settings.INATURALIST_DB_PATH):
+                return None
             
-            return data
+            PlantService._observations = ObservationStore(settings.INATURALIST_DB_PATH)
+        
+        return PlantService._observations.bloom_weeks(
+            taxon_name(flower.scientific_name),
+            flower.location.coords.latitude,
+            flower.location.coords.longitude
+        )
     
     @staticmethod
     def get_predictions():
@@ -62,6 +133,39 @@ class PlantService:
         )
 
         return request
+    
+    @staticmethod
+    def get_cached_plants_prediction() -> tuple[PerenualSpeciesRequest, str, datetime.datetime]:
+        """
+        Same as get_plants_prediction, but reuses the upstream answer for PREDICTIONS_CACHE_TTL seconds.
+        
+        Returns:
+            tuple: The answer, a digest of its data and the date that data last changed.
+        """
+        
+        now = datetime.datetime.now(datetime.timezone.utc)
+        fetched_at = PlantService._predictions_fetched_at
+        
+        if (
+            PlantService._predictions is None
+            or fetched_at is None
+            or (now - fetched_at).total_seconds() > settings.PREDICTIONS_CACHE_TTL
+        ):
+            predictions = PlantService.get_plants_prediction()
+            
+            digest = hashlib.sha1()
+            
+            for datum in predictions.data:
+                digest.update(datum.model_dump_json().encode())
+            
+            if digest.hexdigest() != PlantService._predictions_digest:
+                PlantService._predictions_digest = digest.hexdigest()
+                PlantService._predictions_modified_at = now
+            
+            PlantService._predictions = predictions
+            PlantService._predictions_fetched_at = now
+        
+        return PlantService._predictions, PlantService._predictions_digest, PlantService._predictions_modified_at # type: ignore
 
     @staticmethod
     def search_plant_by_scientific_name(scientific_name: str, return_first_if_not_exists: bool = False) -> Optional[Datum]:
@@ -97,32 +201,59 @@ class PlantService:
         
         return None
     
+    @staticmethod
+    def catalog_bloom_mask(flower: Plant) -> int:
+        """
+        Month bitmask of a plant from the bloom calendar, looked up by id or else by scientific name.
+        
+        Returns:
+            int: 12-bit mask, 0 when the plant isn't in the catalog or its bloom_season names no months.
+        """
+        
+        catalog = PlantService.get_catalog()
+        index = catalog.index_of(flower.id)
+        
+        if index is None or catalog.strings['scientific_name'][index] != flower.scientific_name:
+            indexes = catalog.where(scientific_name=flower.scientific_name)
+            index = int(indexes[0]) if len(indexes) else None
+        
+        return 0 if index is None else int(PlantService.get_bloom_calendar().masks[index])
+    
     @staticmethod
     def get_prediction(flower: Plant) -> Optional[dict[str, Any]|float]:
         """Get plant prediction from Perenual API and GLOBE based on flower data"""
         
-        specie = PlantService.search_plant_by_scientific_name(flower.scientific_name[0])
+        month = utils.month_bit(datetime.datetime.now().month)
+        not_blooming = {'growth_percentage': 0, 'message': 'Not in blooming season'}
+        
+        # The calendar gate runs before any upstream call, Perenual's flowering_season is only
+        # used for plants without a known bloom_season
+        with utils.span('season_gate'):
+            season_mask = PlantService.catalog_bloom_mask(flower)
+        
+        if season_mask and not season_mask & month:
+            return {**flower.dict(), **not_blooming}
+        
+        with utils.span('species_search'):
+            specie = PlantService.search_plant_by_scientific_name(flower.scientific_name)
         
         plant_detail: Optional[PerenualPlantDetail] = None
         
         if specie:
-            raw_request = API.get_json(
-                APIs.PERENUAL.value,
-                'species',
-                {
-                    'key': 'sk-OpS168e21d7d62e7812687',
-                    'id': specie.id
-                }
-            )
+            with utils.span('detail_fetch'):
+                raw_request = API.get_json(
+                    APIs.PERENUAL.value,
+                    'species',
+                    {
+                        'key': 'sk-OpS168e21d7d62e7812687',
+                        'id': specie.id
+                    }
+                )
 
-            plant_detail = PerenualPlantDetail(**raw_request)
-        
-            if utils.current_season() not in plant_detail.flowering_season:
-                return {
-                    **plant_detail.dict(),
-                    'growth_percentage': 0,
-                    'message': 'Not in blooming season'
-                }
+                plant_detail = PerenualPlantDetail(**raw_request)
+            
+            if not season_mask and not utils.season_mask(plant_detail.flowering_season, flower.location.coords.latitude) & month:
+                return {**plant_detail.dict(), **not_blooming}
         
         today_date = datetime.datetime.now()
         start_date = today_date - datetime.timedelta(days=30)
@@ -142,8 +273,8 @@ class PlantService:
         }
         
         # Prepare request data
-        globe_data = json.loads(
-            requests.get(
+        with utils.span('globe_fetch'):
+            globe_response = requests.get(
                 f'{APIs.GLOBE.value}measurement/protocol/measureddate/lat/lon/',
                 params={
                     **default_params,
@@ -154,63 +285,73 @@ class PlantService:
                     'maxlon': flower.location.coords.longitude+10
                 }
             ).text
-        )
         
-        if globe_data['features']:
-            
-            unique_protocols = {}
-            
-            for feature in globe_data.get("features", []):
-                protocol = feature["properties"].get("protocol")
-            
-                if protocol not in unique_protocols:
-                    unique_protocols[protocol] = feature
+        final_values_protocols: Optional[dict[str, Any]] = None
+        
+        with utils.span('parse'):
             
-            final_values_protocols = {}
+            globe_data = json.loads(globe_response)
             
-            for key, value in unique_protocols.items():
+            if globe_data['features']:
                 
-                if key == 'precipitation':
-                    final_values_protocols[key] = value['properties'].get('precipitationsLiquidAccumulation')
+                unique_protocols = {}
                 
-                if key == 'surface_temperature':
-                    final_values_protocols[key] = value['properties'].get('surfacetemperaturesAverageSurfaceTemperatureC')
+                for feature in globe_data.get("features", []):
+                    protocol = feature["properties"].get("protocol")
                 
-                if key == 'vegetation_cover':
-                    final_values_protocols[key] = value['properties'].get('vegatationcoversGroundCoverGreenPercent')
+                    if protocol not in unique_protocols:
+                        unique_protocols[protocol] = feature
                 
-            return {
-                **flower.dict(),
-                'growth_percentage': utils.calculate_growth_percentage(flower, plant_detail, final_values_protocols) if plant_detail else None
-            }
-        
-        if globe_data['results']:
-            
-            unique_protocols = {}
-            
-            for feature in globe_data.get("results", []):
-                protocol = feature.get("protocol")
-            
-                if protocol not in unique_protocols:
-                    unique_protocols[protocol] = feature
-            
-            final_values_protocols = {}
+                final_values_protocols = {}
+                
+                for key, value in unique_protocols.items():
+                    
+                    if key == 'precipitation':
+                        final_values_protocols[key] = value['properties'].get('precipitationsLiquidAccumulation')
+                    
+                    if key == 'surface_temperature':
+                        final_values_protocols[key] = value['properties'].get('surfacetemperaturesAverageSurfaceTemperatureC')
+                    
+                    if key == 'vegetation_cover':
+                        final_values_protocols[key] = value['properties'].get('vegatationcoversGroundCoverGreenPercent')
             
-            for key, value in unique_protocols.items():
+            elif globe_data['results']:
                 
-                if key == 'precipitation':
-                    final_values_protocols[key] = value['data'].get('precipitationsLiquidAccumulation')
+                unique_protocols = {}
                 
-                if key == 'surface_temperature':
-                    final_values_protocols[key] = value['data'].get('surfacetemperaturesAverageSurfaceTemperatureC')
+                for feature in globe_data.get("results", []):
+                    protocol = feature.get("protocol")
                 
-                if key == 'vegetation_cover':
-                    final_values_protocols[key] = value['data'].get('vegatationcoversGroundCoverGreenPercent')
+                    if protocol not in unique_protocols:
+                        unique_protocols[protocol] = feature
                 
-            return {
-                **flower.dict(),
-                'growth_percentage':utils.calculate_growth_percentage(flower, plant_detail, final_values_protocols) if plant_detail else None
-            }
+                final_values_protocols = {}
+                
+                for key, value in unique_protocols.items():
+                    
+                    if key == 'precipitation':
+                        final_values_protocols[key] = value['data'].get('precipitationsLiquidAccumulation')
+                    
+                    if key == 'surface_temperature':
+                        final_values_protocols[key] = value['data'].get('surfacetemperaturesAverageSurfaceTemperatureC')
+                    
+                    if key == 'vegetation_cover':
+                        final_values_protocols[key] = value['data'].get('vegatationcoversGroundCoverGreenPercent')
+        
+        if final_values_protocols is None:
+            return None
+        
+        with utils.span('growth'):
+            growth_percentage = utils.calculate_growth_percentage(flower, plant_detail, final_values_protocols) if plant_detail else None
+        
+        with utils.span('phenology'):
+            observed_bloom_weeks = PlantService.observed_bloom_weeks(flower)
+        
+        return {
+            **flower.dict(),
+            'growth_percentage': growth_percentage,
+            'observed_bloom_weeks': observed_bloom_weeks
+        }
         
         # if not globe_data['features']:
         #     country = utils.get_country(flower.latitude, flower.longitude)
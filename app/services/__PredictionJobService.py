@@ -0,0 +1,211 @@
+from typing import Any, AsyncIterator, Optional
+from app.models import Plant, PredictionJob, PredictionJobResult, PredictionJobResultsPage
+from .__JobStore import JobStore
+from .__PlantService import PlantService
+import asyncio, json, logging, os, socket, uuid
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionJobService:
+    """
+    Runs prediction jobs in a pool of async workers and streams their progress.
+
+    Every JobStore call is a blocking SQLite query or commit, they run in the default
+    thread pool with `asyncio.to_thread` so they never stall the event loop.
+
+    The store is the only shared state, so any number of server processes can serve the same
+    jobs: workers claim jobs atomically in the store, and event streams poll it for progress and
+    results, whichever process runs the job.
+    """
+
+    def __init__(self, store: JobStore, workers: int, concurrency: int, poll_interval: float = 1.0, lease: float = 30):
+        self.store = store
+        self.workers = workers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """
+        Start the workers and the lease renewal.
+
+        Jobs interrupted by the last shutdown are resumed by whichever process claims them once
+        their lease expires.
+        """
+
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._renew_leases()))
+
+    async def stop(self) -> None:
+
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Hand the interrupted jobs back right away instead of waiting for their lease to expire
+        await asyncio.to_thread(self.store.release, self.owner)
+
+    async def submit(self, plants: list[Plant]) -> PredictionJob:
+
+        if self._wakeup is None:
+            raise RuntimeError('PredictionJobService is not started')
+
+        job = await asyncio.to_thread(self.store.create, plants)
+
+        # Local workers pick it up right away, the others on their next poll
+        self._wakeup.set()
+
+        return job
+
+    async def get(self, job_id: str) -> Optional[PredictionJob]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def results(self, job_id: str, page: int, per_page: int) -> PredictionJobResultsPage:
+
+        return PredictionJobResultsPage(
+            job_id=job_id,
+            page=page,
+            per_page=per_page,
+            total=await asyncio.to_thread(self.store.count_results, job_id),
+            results=await asyncio.to_thread(self.store.results, job_id, page, per_page)
+        )
+
+    async def _renew_leases(self) -> None:
+
+        while True:
+            await asyncio.sleep(self.lease/3)
+
+            try:
+                await asyncio.to_thread(self.store.renew, self.owner, self.lease)
+            except Exception:
+                logger.exception('Could not renew the prediction job leases of %s', self.owner)
+
+    async def _next_job(self) -> str:
+        """Wait until a job can be claimed by this process"""
+
+        assert self._wakeup is not None
+
+        while True:
+
+            try:
+                job_id = await asyncio.to_thread(self.store.claim, self.owner, self.lease)
+            except Exception:
+                logger.exception('Could not claim a prediction job')
+                job_id = None
+
+            if job_id is not None:
+                return job_id
+
+            self._wakeup.clear()
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self) -> None:
+
+        while True:
+
+            job_id = await self._next_job()
+
+            try:
+                await self._run(job_id)
+            except Exception as error:
+                logger.exception('Prediction job %s failed', job_id)
+                await asyncio.to_thread(self.store.set_status, job_id, 'failed', str(error))
+
+    async def _predict(self, job_id: str, index: int, plant: Plant) -> None:
+
+        assert self._semaphore is not None
+
+        async with self._semaphore:
+            try:
+                # get_prediction does blocking upstream I/O, keep it off the event loop
+                prediction = await asyncio.to_thread(PlantService.get_prediction, plant)
+                result = PredictionJobResult(index=index, plant_id=plant.id, prediction=prediction)
+            except Exception as error:
+                result = PredictionJobResult(index=index, plant_id=plant.id, error=str(error))
+
+        await asyncio.to_thread(self.store.add_result, job_id, result)
+
+    async def _run(self, job_id: str) -> None:
+
+        pending = iter(await asyncio.to_thread(lambda: list(self.store.pending_plants(job_id))))
+
+        # A fixed number of consumers per job keeps the task count bounded for huge jobs,
+        # the shared semaphore bounds the upstream calls across every running job
+        async def consume() -> None:
+            for index, plant in pending:
+                await self._predict(job_id, index, plant)
+
+        await asyncio.gather(*(consume() for _ in range(self.concurrency)))
+
+        await asyncio.to_thread(self.store.set_status, job_id, 'done')
+
+    @staticmethod
+    def _format_event(event: str, data: Any) -> str:
+        return f'event: {event}\ndata: {json.dumps(data, default=str)}\n\n'
+
+    async def events(self, job_id: str, keepalive: float = 15) -> AsyncIterator[str]:
+        """
+        Server-Sent Events stream with the progress and partial results of a job.
+
+        The store is polled every `poll_interval` seconds, so the stream works on any process.
+        """
+
+        cursor = await asyncio.to_thread(self.store.last_result)
+        job = await self.get(job_id)
+
+        if job is None:
+            return
+
+        if job.status in ('done', 'failed'):
+            yield self._format_event('done', job.model_dump(mode='json'))
+            return
+
+        yield self._format_event('progress', job.model_dump(mode='json'))
+
+        idle = 0.0
+
+        while True:
+
+            await asyncio.sleep(self.poll_interval)
+
+            # Job first, so the results of a finished job are all read before its done event
+            current = await self.get(job_id)
+            results, cursor = await asyncio.to_thread(self.store.results_after, job_id, cursor)
+
+            if current is None:
+                return
+
+            for result in results:
+                yield self._format_event('result', result.model_dump(mode='json'))
+
+            if current.status in ('done', 'failed'):
+                yield self._format_event('done', current.model_dump(mode='json'))
+                return
+
+            if current != job:
+                yield self._format_event('progress', current.model_dump(mode='json'))
+                job = current
+                idle = 0
+            elif results:
+                idle = 0
+            else:
+                idle += self.poll_interval
+
+                if idle >= keepalive:
+                    yield ': keepalive\n\n'
+                    idle = 0
@@ -5,4 +5,8 @@ Services package initialization
 from ..enums import APIs
 from ..models import Plant, PerenualSpeciesRequest, Datum
 from ._API import API
-from .__PlantService import PlantService
\ No newline at end of file
+from .__ObservationStore import ObservationStore
+from .__INaturalistService import INaturalistService, taxon_name, tile_bbox, page_key
+from .__PlantService import PlantService
+from .__JobStore import JobStore
+from .__PredictionJobService import PredictionJobService
@@ -0,0 +1,100 @@
+from typing import Iterable, Optional
+from app.models import PlantCatalog
+from app.ptypes import Station
+from .__current_season import NORTHERN_SEASONS, SOUTHERN_SEASONS
+import numpy as np
+import re
+
+
+def _season_masks(seasons: tuple[Station, ...]) -> dict[str, int]:
+
+    masks: dict[str, int] = {}
+
+    for month, season in enumerate(seasons):
+        masks[season.lower()] = masks.get(season.lower(), 0) | 1 << month
+
+    masks['autumn'] = masks['fall']
+
+    return masks
+
+
+# 12-bit month masks of every season, bit 0 is January
+NORTHERN_MASKS = _season_masks(NORTHERN_SEASONS)
+SOUTHERN_MASKS = _season_masks(SOUTHERN_SEASONS)
+
+
+def month_bit(month: int) -> int:
+    return 1 << (month - 1)
+
+
+def season_mask(seasons: Iterable[str] | str, latitude: Optional[float] = None) -> int:
+    """
+    Month bitmask of one or more seasons in the hemisphere of a latitude.
+
+    Args:
+        seasons (Iterable[str] | str): Season names, or a single string such as "Spring-Summer".
+        latitude (float): Negative latitudes use southern hemisphere months, north by default.
+
+    Returns:
+        int: 12-bit mask, bit 0 is January. Unknown names add no months.
+    """
+
+    if isinstance(seasons, str):
+        seasons = re.split(r'[\s,;/\-]+', seasons)
+
+    masks = SOUTHERN_MASKS if latitude is not None and latitude < 0 else NORTHERN_MASKS
+    mask = 0
+
+    for season in seasons:
+        mask |= masks.get(season.strip().lower(), 0)
+
+    return mask
+
+
+class BloomCalendar:
+    """
+    Month bitmask of every catalog plant, indexed by month and country.
+
+    For each month the blooming rows are kept sorted by country code, so a month and region
+    query is a binary search over a precomputed slice.
+    """
+
+    def __init__(self, catalog: PlantCatalog):
+
+        self.catalog = catalog
+
+        # Masks are computed once per distinct bloom_season value and hemisphere, then gathered
+        seasons = catalog.strings['bloom_season']
+        north = np.array([season_mask(value) for value in seasons.values()] + [0], dtype=np.uint16)
+        south = np.array([season_mask(value, -1) for value in seasons.values()] + [0], dtype=np.uint16)
+
+        # Code -1 (no season) picks the trailing 0
+        self.masks: np.ndarray = np.where(catalog.latitude < 0, south[seasons.codes], north[seasons.codes])
+
+        countries = catalog.strings['country_code'].codes
+        self._rows: list[np.ndarray] = []
+        self._countries: list[np.ndarray] = []
+
+        for month in range(1, 13):
+            rows = np.flatnonzero(self.masks & month_bit(month))
+            rows = rows[np.argsort(countries[rows], kind='stable')]
+
+            self._rows.append(rows)
+            self._countries.append(countries[rows])
+
+    def blooming(self, month: int, country_code: Optional[str] = None) -> np.ndarray:
+        """Catalog rows blooming in a month, optionally only in one country (case insensitive)"""
+
+        rows = self._rows[month - 1]
+
+        if country_code is None:
+            return rows
+
+        code = self.catalog.strings['country_code'].code(country_code.upper())
+
+        if code is None:
+            return rows[:0]
+
+        countries = self._countries[month - 1]
+
+        return rows[np.searchsorted(countries, code, 'left'):np.searchsorted(countries, code, 'right')]
@@ -1,17 +1,23 @@
-from datetime import date
+from typing import Optional
 from app.ptypes import Station
 import datetime
 
-def current_season() -> Station: # type: ignore
+# Northern hemisphere season of each month, index 0 is January
+NORTHERN_SEASONS: tuple[Station, ...] = (
+    'Winter', 'Winter',
+    'Spring', 'Spring', 'Spring',
+    'Summer', 'Summer', 'Summer',
+    'Fall', 'Fall', 'Fall',
+    'Winter'
+)
+
+# Seasons are shifted by six months south of the equator
+SOUTHERN_SEASONS: tuple[Station, ...] = NORTHERN_SEASONS[6:] + NORTHERN_SEASONS[:6]
+
+def current_season(latitude: Optional[float] = None, month: Optional[int] = None) -> Station:
+    """Season of a month (the current one by default) in the hemisphere of a latitude (north by default)"""
     
-    stations: dict[Station, list[int]] = {
-        "Winter": [12, 1, 2],
-        "Spring": [3, 4, 5],
-        "Summer": [6, 7, 8],
-        "Fall": [9, 10, 11]
-    }
+    month = month or datetime.datetime.now().month
+    seasons = SOUTHERN_SEASONS if latitude is not None and latitude < 0 else NORTHERN_SEASONS
     
-    for station in stations:
-        
-        if datetime.datetime.now().month in stations[station]:
-            return station
\ No newline at end of file
+    return seasons[month - 1]
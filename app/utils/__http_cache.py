@@ -0,0 +1,209 @@
+from typing import Any, Callable, Optional
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from threading import Lock
+from fastapi import Request, Response, status
+from app.config import settings
+from .__spans import span
+import gzip, hashlib, json
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+class _VariantCache:
+    """
+    LRU of already serialized (and compressed) bodies keyed by ETag and encoding.
+
+    The cache is bounded by the total size of the bodies, and bodies larger than max_body_bytes
+    are never kept, so a huge catalog response can't pin hundreds of MB per worker.
+    """
+
+    def __init__(self, max_bytes: int, max_body_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_body_bytes
+        self.size = 0
+        self._entries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, etag: str, encoding: str) -> Optional[bytes]:
+
+        with self._lock:
+            body = self._entries.get((etag, encoding))
+
+            if body is not None:
+                self._entries.move_to_end((etag, encoding))
+
+            return body
+
+    def put(self, etag: str, encoding: str, body: bytes) -> None:
+
+        if len(body) > min(self.max_body_bytes, self.max_bytes):
+            return
+
+        with self._lock:
+            previous = self._entries.pop((etag, encoding), None)
+
+            if previous is not None:
+                self.size -= len(previous)
+
+            self._entries[(etag, encoding)] = body
+            self.size += len(body)
+
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+variant_cache = _VariantCache(settings.HTTP_CACHE_MAX_BYTES, settings.HTTP_CACHE_MAX_BODY_BYTES)
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from the version parts of a representation"""
+
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:20]
+
+    return f'W/"{digest}"'
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+
+    if if_none_match.strip() == '*':
+        return True
+
+    # Weak comparison (RFC 9110 8.8.3.2), every representation here is weak
+    opaque = etag.removeprefix('W/')
+
+    return any(
+        candidate.strip().removeprefix('W/') == opaque
+        for candidate in if_none_match.split(',')
+    )
+
+
+def _not_modified_since(last_modified: datetime, if_modified_since: str) -> bool:
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _negotiate_encoding(accept_encoding: str) -> str:
+    """Pick br, gzip or identity from the Accept-Encoding header"""
+
+    accepted: dict[str, float] = {}
+
+    for item in accept_encoding.split(','):
+
+        token, _, params = item.strip().partition(';')
+        quality = 1.0
+
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+
+        if token:
+            accepted[token.strip().lower()] = quality
+
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+
+    return 'identity'
+
+
+def _encode(body: bytes, encoding: str) -> bytes:
+
+    if encoding == 'br':
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)  # type: ignore
+
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=settings.GZIP_LEVEL, mtime=0)
+
+    return body
+
+
+def cached_json_response(
+    request: Request,
+    build: Callable[[], Any],
+    *,
+    version: tuple[Any, ...],
+    last_modified: datetime,
+    cache_control: str
+) -> Response:
+    """
+    Answer a JSON GET request honoring conditional headers.
+
+    Args:
+        request (Request): The incoming request, used for its conditional and encoding headers.
+        build (Callable): Produces the JSON-able content, only called on a variant cache miss.
+        version (tuple): Everything the representation depends on (catalog version, ids, ...).
+        last_modified (datetime): When the underlying data last changed.
+        cache_control (str): Cache-Control policy of the route.
+
+    Returns:
+        Response: A 304 without body when the client copy is fresh, otherwise the (compressed) JSON body.
+    """
+
+    etag = make_etag(request.url.path, *version)
+
+    headers = {
+        'ETag': etag,
+        'Last-Modified': format_datetime(last_modified.astimezone(timezone.utc), usegmt=True),
+        'Cache-Control': cache_control,
+        'Vary': 'Accept-Encoding',
+    }
+
+    if_none_match = request.headers.get('if-none-match')
+    if_modified_since = request.headers.get('if-modified-since')
+
+    if if_none_match is not None:
+        if _etag_matches(etag, if_none_match):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    elif if_modified_since is not None and _not_modified_since(last_modified, if_modified_since):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    identity = variant_cache.get(etag, 'identity')
+
+    if identity is None:
+        with span('serialize'):
+            identity = json.dumps(build(), default=str, separators=(',', ':')).encode()
+        variant_cache.put(etag, 'identity', identity)
+
+    encoding = 'identity'
+    body = identity
+
+    if len(identity) >= settings.COMPRESSION_MIN_SIZE:
+        encoding = _negotiate_encoding(request.headers.get('accept-encoding', ''))
+
+    if encoding != 'identity':
+
+        body = variant_cache.get(etag, encoding)
+
+        if body is None:
+            with span('compress'):
+                body = _encode(identity, encoding)
+            variant_cache.put(etag, encoding, body)
+
+        headers['Content-Encoding'] = encoding
+
+    return Response(content=body, media_type='application/json', headers=headers)
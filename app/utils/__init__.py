@@ -1,4 +1,8 @@
 
 from .__get_country import get_country
 from .__current_season import current_season
-from .__calculate_grow import calculate_growth_percentage
\ No newline at end of file
+from .__bloom_calendar import BloomCalendar, season_mask, month_bit
+from .__calculate_grow import calculate_growth_percentage
+from .__http_cache import cached_json_response, make_etag, variant_cache
+from .__profiler import SamplingProfiler, start_profile, finish_profile, profile_thread
+from .__spans import Span, span, start_spans, current_spans, finish_spans, server_timing
@@ -0,0 +1,126 @@
+from typing import Iterator, Optional
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from types import FrameType
+import os, sys, threading
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a single request.
+
+    Only two kinds of stacks are sampled: the event loop thread while the request's own coroutine
+    (`root`, the frame of the middleware call) is running on it, and worker threads while they run
+    code of the request inside `profile_thread()` (every `span()` enters it). Other requests, idle
+    threads and the request's worker thread code outside spans are not part of the profile.
+
+    The result is written in the collapsed stack format (`frame;frame;frame count`) read by
+    flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, interval: float, root: Optional[FrameType] = None):
+        self.interval = interval
+        self.root = root
+        self.samples: Counter[str] = Counter()
+        self._threads: Counter[int] = Counter()
+        self._threads_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enter_thread(self) -> None:
+
+        with self._threads_lock:
+            self._threads[threading.get_ident()] += 1
+
+    def exit_thread(self) -> None:
+
+        with self._threads_lock:
+            thread_id = threading.get_ident()
+            self._threads[thread_id] -= 1
+
+            if self._threads[thread_id] <= 0:
+                del self._threads[thread_id]
+
+    def _collapse(self, frame: Optional[FrameType], tracked: bool) -> Optional[str]:
+        """Collapsed stack of a thread, None when it isn't running code of this request"""
+
+        stack: list[str] = []
+        in_request = tracked
+
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+            in_request = in_request or frame is self.root
+            frame = frame.f_back
+
+        return ';'.join(reversed(stack)) if in_request else None
+
+    def _run(self) -> None:
+
+        own_id = threading.get_ident()
+
+        while not self._stop.wait(self.interval):
+
+            with self._threads_lock:
+                tracked = set(self._threads)
+
+            for thread_id, frame in sys._current_frames().items():
+
+                if thread_id == own_id:
+                    continue
+
+                stack = self._collapse(frame, thread_id in tracked)
+
+                if stack is not None:
+                    self.samples[stack] += 1
+
+    def start(self) -> None:
+
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def write_collapsed(self, path: str) -> None:
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.samples.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+_profiler: ContextVar[Optional[SamplingProfiler]] = ContextVar('profiler', default=None)
+
+
+def start_profile(profiler: SamplingProfiler) -> Token:
+    """Attach a profiler to the current request, worker threads inherit it through the context"""
+    return _profiler.set(profiler)
+
+
+def finish_profile(token: Token) -> None:
+    _profiler.reset(token)
+
+
+@contextmanager
+def profile_thread() -> Iterator[None]:
+    """Sample the current thread for the request being profiled, if any, until the block exits"""
+
+    profiler = _profiler.get()
+
+    if profiler is None:
+        yield
+        return
+
+    profiler.enter_thread()
+
+    try:
+        yield
+    finally:
+        profiler.exit_thread()
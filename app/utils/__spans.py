@@ -0,0 +1,72 @@
+from typing import Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from .__profiler import profile_thread
+import time
+
+
+@dataclass
+class Span:
+    name: str
+    wall_ms: float
+    cpu_ms: float
+
+
+_spans: ContextVar[Optional[list[Span]]] = ContextVar('spans', default=None)
+
+
+def start_spans() -> Token:
+    """Start collecting spans for the current request"""
+    return _spans.set([])
+
+
+def current_spans() -> list[Span]:
+    """Spans recorded so far in the current request"""
+    return list(_spans.get() or [])
+
+
+def finish_spans(token: Token) -> list[Span]:
+    """Stop collecting spans and return the ones recorded since start_spans"""
+
+    spans = _spans.get() or []
+    _spans.reset(token)
+
+    return spans
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a stage of the current request.
+
+    Wall time includes upstream waits, CPU time only counts the current thread, so
+    `wall - cpu` is roughly the time spent waiting on I/O. It's a no-op outside a request
+    that started collecting spans. Inside a profiled request, the thread running the span
+    is also sampled by the request's profiler.
+    """
+
+    spans = _spans.get()
+
+    with profile_thread():
+
+        if spans is None:
+            yield
+            return
+
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+
+        try:
+            yield
+        finally:
+            spans.append(Span(name, (time.perf_counter() - wall)*1000, (time.thread_time() - cpu)*1000))
+
+
+def server_timing(spans: list[Span]) -> str:
+    """Format spans as a Server-Timing header value"""
+
+    return ', '.join(
+        f'{item.name};dur={item.wall_ms:.1f};desc="cpu={item.cpu_ms:.1f}ms"'
+        for item in spans
+    )
@@ -1,39 +1,33 @@
-from app import Point, Location, Plant
-# UNUSED
+from app.ingestion import ingest
+from app.config import settings
+import argparse
 
-# def convert_to_plant(data: dict) -> Plant:
-#     """Convert a raw flower dictionary into a validated Plant model."""
+
+def main():
+    """Import a bulk plant dump (JSON array, NDJSON or CSV) into the catalog file"""
+    
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('source', help='Raw plants file: .json, .ndjson/.jsonl or .csv')
+    parser.add_argument('-o', '--output', default=settings.CATALOG_PATH, help='Catalog file to write')
+    parser.add_argument('-e', '--errors', default=None, help='NDJSON file for rejected rows (default: <output>.errors.ndjson)')
+    parser.add_argument('-f', '--format', choices=['json', 'ndjson', 'csv'], default=None, help='Input format (default: from extension)')
+    parser.add_argument('-c', '--chunk-size', type=int, default=5000, help='Records per chunk')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Worker processes (default: one per core)')
+    parser.add_argument('--restart', action='store_true', help='Discard an existing checkpoint and start over')
+    args = parser.parse_args()
     
-#     max_deg = lambda x: min(max(x, -90), 90)
-#     location = Location(
-#         country_code=data.get("country_code"),
-#         location_name=data.get("location_name"),
-#         coords=Point(
-#             latitude=max_deg(data.get("latitude")),
-#             longitude=max_deg(data.get("longitude"))
-#         )
-#     )
+    result = ingest(
+        args.source,
+        args.output,
+        errors_path=args.errors,
+        record_format=args.format,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        restart=args.restart
+    )
+    
+    print(f'{result.accepted} plants imported into {args.output}, {result.rejected} rejected')
 
-#     return Plant(
-#         id=data["id"],
-#         scientific_name=data["scientific_name"],
-#         common_name=data.get("common_name"),
-#         description=data.get("description"),
-#         max_height=data.get("max_height"),
-#         initial_height=data.get("initial_height"),
-#         temperature_to_grow=data.get("temperature_to_grow"),
-#         growth_rate=data.get("growth_rate"),
-#         bloom_season=data.get("bloom_season"),
-#         created_at=data.get("created_at"),
-#         updated_at=data.get("updated_at"),
-#         planting_date=data.get("planting_date"),
-#         location=location
-#     )
 
-# with open('data/examples/plants_data.json') as file:
-#     import json
-#     raw_data = json.load(file)
-#     plants = [convert_to_plant(item) for item in raw_data]
-    
-#     with open('data/examples/converted_plants_data.json', 'w') as outfile:
-#         json.dump([plant.dict() for plant in plants], outfile, indent=4, default=str)
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from app.config import settings
+from app.services import INaturalistService, ObservationStore, PlantService, page_key, taxon_name
+import argparse, logging, os
+
+
+def ingest(args):
+    """Fetch the flowering observations of the catalog taxa inside a region"""
+
+    taxa = args.taxa or [taxon_name(name) for name in PlantService.get_catalog().strings['scientific_name'].values()]
+    store = ObservationStore(args.db)
+    service = INaturalistService(
+        store,
+        args.url,
+        per_page=args.per_page,
+        workers=args.workers,
+        record_dir=args.record,
+        rate=args.rate
+    )
+
+    added = service.ingest(taxa, tuple(args.bbox), args.tile_size)
+
+    print(f'{added} new observations, {store.count()} stored in {args.db}')
+
+
+def index(args):
+    """Rebuild the per taxon, per cell, per week phenology index"""
+
+    entries = ObservationStore(args.db).build_phenology(args.cell_size)
+
+    print(f'{entries} phenology entries with {args.cell_size} degree cells')
+
+
+def stub(args):
+    """Serve pages recorded with `ingest --record` as if it were the iNaturalist API"""
+
+    directory = args.pages
+
+    class RecordedPagesHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+
+            url = urlsplit(self.path)
+            path = os.path.join(directory, f'{page_key(dict(parse_qsl(url.query)))}.json')
+
+            if not url.path.endswith('/observations') or not os.path.exists(path):
+                self.send_error(404, 'No recorded page for this query')
+                return
+
+            with open(path, 'rb') as file:
+                body = file.read()
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((args.host, args.port), RecordedPagesHandler)
+
+    print(f'Serving {directory} on http://{args.host}:{args.port}/v1/')
+    server.serve_forever()
+
+
+def main():
+    """iNaturalist observations ingestion and phenology index"""
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    subparsers = parser.add_subparsers(required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help=ingest.__doc__)
+    ingest_parser.add_argument('--bbox', type=float, nargs=4, required=True, metavar=('SWLAT', 'SWLNG', 'NELAT', 'NELNG'))
+    ingest_parser.add_argument('--tile-size', type=float, default=1.0, help='Tile side in degrees')
+    ingest_parser.add_argument('--taxa', nargs='*', default=None, help='Taxon names (default: every catalog species)')
+    ingest_parser.add_argument('--workers', type=int, default=settings.INATURALIST_WORKERS)
+    ingest_parser.add_argument('--per-page', type=int, default=settings.INATURALIST_PER_PAGE)
+    ingest_parser.add_argument('--rate', type=float, default=settings.INATURALIST_RATE_LIMIT, help='Requests per second across workers')
+    ingest_parser.add_argument('--url', default=settings.INATURALIST_URL, help='API base url, e.g. a local stub')
+    ingest_parser.add_argument('--record', default=None, help='Directory where raw pages are saved for the stub')
+    ingest_parser.add_argument('--db', default=settings.INATURALIST_DB_PATH)
+    ingest_parser.set_defaults(command=ingest)
+
+    index_parser = subparsers.add_parser('index', help=index.__doc__)
+    index_parser.add_argument('--cell-size', type=float, default=settings.PHENOLOGY_CELL_SIZE, help='Cell side in degrees')
+    index_parser.add_argument('--db', default=settings.INATURALIST_DB_PATH)
+    index_parser.set_defaults(command=index)
+
+    stub_parser = subparsers.add_parser('stub', help=stub.__doc__)
+    stub_parser.add_argument('pages', help='Directory with recorded pages')
+    stub_parser.add_argument('--host', default='127.0.0.1')
+    stub_parser.add_argument('--port', type=int, default=8001)
+    stub_parser.set_defaults(command=stub)
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    args.command(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from app.config import settings
-from app.routers import plants
+from app.middleware import TracingMiddleware, ProfilingMiddleware
+from app.routers import plants, jobs
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the prediction job workers with the application"""
+    
+    await jobs.prediction_job_service.start()
+    yield
+    await jobs.prediction_job_service.stop()
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
-    description="API of floration events"
+    description="API of floration events",
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -17,10 +29,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "Server-Timing", "X-Profile-File"],
 )
 
+# Per stage timings of each request in the Server-Timing header
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, slow_request_ms=settings.SLOW_REQUEST_MS)
+
+# Statistical profile of requests sent with the profile header or sampled at PROFILE_SAMPLE_RATE
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.PROFILE_DIR,
+        header=settings.PROFILE_HEADER,
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        interval=settings.PROFILE_INTERVAL
+    )
+
+# Compression for routes that don't pre-compress their own bodies
+app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
 # Include routers
 app.include_router(plants.router, tags=["plants"])
+app.include_router(jobs.router, tags=["jobs"])
 
 @app.get("/")
 async def root():